@@ -0,0 +1,104 @@
+"""Query-plan check for the AI service's hot queries, fails on collection scans.
+
+Runs ``explain`` (executionStats) against the configured database, so use a
+copy with realistic data; on empty collections ``$lookup`` stages never run
+and are not checked.
+
+    python -m benchmarks.explain_plans
+    python -m benchmarks.explain_plans --ensure-indexes
+"""
+import sys
+import uuid
+import argparse
+
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+
+from src.configs.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from src.configs.indexes import ensure_indexes
+from src.api.roster import build_project_tasks_pipeline
+from src.services.features import build_active_projects_pipeline
+
+def _sample(database, collection, field):
+    doc = database.get_collection(collection).find_one({field: {"$exists": True}}, {field: 1})
+    return doc[field] if doc else ObjectId()
+
+def hot_queries(database) -> dict:
+    user_id = _sample(database, "projectassignments", "userId")
+    project_id = _sample(database, "tasks", "projectId")
+    task_id = _sample(database, "taskassignments", "taskId")
+    since = datetime.now(timezone.utc) - timedelta(days=1)
+    claim = uuid.uuid4().hex
+
+    return {
+        "users by role": {"find": "users", "filter": {"role": "staff"}},
+        "users changed since": {"find": "users", "filter": {"updatedAt": {"$gt": since}}},
+        "active projects per user": {
+            "aggregate": "projectassignments",
+            "pipeline": build_active_projects_pipeline([user_id]),
+            "cursor": {},
+        },
+        "project tasks for embeddings": {
+            "aggregate": "tasks",
+            "pipeline": build_project_tasks_pipeline(project_id),
+            "cursor": {},
+        },
+        "task assignees": {"find": "taskassignments", "filter": {"taskId": {"$in": [task_id]}}},
+        "project embeddings by user": {"find": "projectembeddings", "filter": {"user_id": user_id}},
+        "project embedding upsert": {"find": "projectembeddings", "filter": {"user_id": user_id, "project_id": project_id}},
+        "latest project embedding update": {
+            "find": "projectembeddings", "filter": {}, "sort": {"updated_at": -1}, "limit": 1,
+        },
+        "task embedding queue claim": {
+            "find": "taskembeddingqueue",
+            "filter": {"$or": [{"claimed_at": None}, {"claimed_at": {"$lt": since}}]},
+            "sort": {"queued_at": 1},
+            "limit": 1,
+        },
+        "task embedding batch read": {"find": "taskembeddingqueue", "filter": {"claim": claim}},
+        "task embedding batch delete": {
+            "delete": "taskembeddingqueue", "deletes": [{"q": {"claim": claim}, "limit": 0}],
+        },
+    }
+
+def find_collection_scans(plan, path="") -> list:
+    """Return the paths of every COLLSCAN stage, and of ``$lookup`` stages that scanned a collection."""
+    scans = []
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            scans.append(f"{path} COLLSCAN {plan.get('namespace', '')}".strip())
+        if plan.get("collectionScans"):
+            scans.append(f"{path} {plan['collectionScans']} collection scan(s)".strip())
+        for key, value in plan.items():
+            scans += find_collection_scans(value, f"{path}.{key}" if path else key)
+    elif isinstance(plan, list):
+        for i, value in enumerate(plan):
+            scans += find_collection_scans(value, f"{path}[{i}]")
+    return scans
+
+def check(database) -> bool:
+    ok = True
+    for name, command in hot_queries(database).items():
+        plan = database.command("explain", command, verbosity="executionStats")
+        scans = find_collection_scans(plan)
+        print(f"{'FAIL' if scans else 'ok  '}  {name}")
+        for scan in scans:
+            print(f"        {scan}")
+        ok = ok and not scans
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ensure-indexes", action="store_true", help="Create missing indexes before checking")
+    args = parser.parse_args()
+
+    connect_to_mongo()
+    try:
+        database = get_database()
+        if args.ensure_indexes:
+            ensure_indexes(database)
+        ok = check(database)
+    finally:
+        close_mongo_connection()
+
+    sys.exit(0 if ok else 1)
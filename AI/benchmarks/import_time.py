@@ -0,0 +1,42 @@
+"""Import-time profile of the service, from ``python -X importtime``.
+
+    python -m benchmarks.import_time                    # profile src.main
+    python -m benchmarks.import_time --module src.api.roster --top 30
+"""
+import argparse
+import subprocess
+import sys
+
+def profile(module: str) -> list:
+    """Return ``(self_us, cumulative_us, depth, name)`` for every module imported by ``module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+def report(module: str, top: int) -> str:
+    rows = profile(module)
+    total = next(cumulative for _, cumulative, _, name in rows if name == module)
+    lines = [f"import {module}: {total / 1e6:.3f}s", "", f"{'cumulative':>12}  {'self':>10}  module"]
+    for self_us, cumulative_us, depth, name in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+        lines.append(f"{cumulative_us / 1e3:10.1f}ms  {self_us / 1e3:8.1f}ms  {'  ' * depth}{name}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    print(report(args.module, args.top))
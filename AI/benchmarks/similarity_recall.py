@@ -0,0 +1,88 @@
+"""Recall and latency of the IVF project-similarity index against exact search.
+
+IVF picks candidate rows, users with fewer than k candidates are then scored
+exactly from their own rows; the recall and score error below include that
+fallback. IVF is only faster when few users need it, see the "Choosing IVF
+settings" table in src/api/README.md.
+
+Uses synthetic clustered embeddings so it runs without a database:
+
+    python -m benchmarks.similarity_recall --rows 50000 --users 2000 --dim 384
+"""
+import argparse
+import time
+import numpy as np
+
+from src.services.similarity import ProjectSimilarityIndex
+
+def make_dataset(rows, users, dim, topics, rng):
+    topic_centers = rng.normal(size=(topics, dim)).astype(np.float32)
+    topic_of_row = rng.integers(0, topics, size=rows)
+    vectors = topic_centers[topic_of_row] + 0.5 * rng.normal(size=(rows, dim)).astype(np.float32)
+    user_ids = rng.integers(0, users, size=rows).tolist()
+    queries = topic_centers[rng.integers(0, topics, size=50)] + 0.5 * rng.normal(size=(50, dim)).astype(np.float32)
+    return user_ids, vectors, queries
+
+def run(rows, users, dim, topics, nlist, nprobe, k, top_users, seed):
+    rng = np.random.default_rng(seed)
+    user_ids, vectors, queries = make_dataset(rows, users, dim, topics, rng)
+
+    exact = ProjectSimilarityIndex(user_ids, vectors)
+    start = time.time()
+    ann = ProjectSimilarityIndex(user_ids, vectors, use_ann=True, min_rows_for_ann=0, nlist=nlist, nprobe=nprobe, seed=seed)
+    build_time = time.time() - start
+
+    exact_time, ann_time = 0.0, 0.0
+    hits, total, score_errors = 0, 0, []
+    fallback_users = 0
+    top_hits, top_total = 0, 0
+    for query in queries:
+        start = time.time()
+        expected = exact.top_k_per_user(query, k)
+        exact_time += time.time() - start
+
+        start = time.time()
+        actual = ann.top_k_per_user(query, k)
+        ann_time += time.time() - start
+
+        # Users the probed clusters did not cover with k rows, they cost an exact scan of their own rows
+        unit = query / np.linalg.norm(query)
+        probed = ann._top_k_by_user(ann._candidates(unit), unit, k)
+        fallback_users += len(expected) - sum(1 for sims in probed.values() if len(sims) >= k)
+
+        for user_id, sims in expected.items():
+            found = actual.get(user_id, [])
+            hits += sum(1 for sim in sims if np.isclose(found, sim, atol=1e-6).any())
+            total += len(sims)
+            score_errors.append(abs(np.mean(sims) - (np.mean(found) if found else 0.0)))
+
+        # Users that would actually compete for a slot: best exact top-k averages
+        best = sorted(expected, key=lambda user_id: np.mean(expected[user_id]), reverse=True)[:top_users]
+        for user_id in best:
+            found = actual.get(user_id, [])
+            top_hits += sum(1 for sim in expected[user_id] if np.isclose(found, sim, atol=1e-6).any())
+            top_total += len(expected[user_id])
+
+    print(f"rows={rows} users={users} dim={dim} nlist={len(ann.centroids)} nprobe={nprobe} k={k}")
+    print(f"IVF build time:         {build_time:.3f}s")
+    print(f"exact query (avg):      {exact_time / len(queries) * 1000:.2f}ms")
+    print(f"IVF query (avg):        {ann_time / len(queries) * 1000:.2f}ms")
+    print(f"users in exact fallback: {fallback_users / (len(queries) * len(exact.users)):.1%}")
+    print(f"recall@{k} per user:      {hits / total:.4f}")
+    print(f"recall@{k} top {top_users} users: {top_hits / top_total:.4f}")
+    print(f"top-{k} avg score error (after exact fallback): mean={np.mean(score_errors):.4f} max={np.max(score_errors):.4f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=100)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--top-users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run(args.rows, args.users, args.dim, args.topics, args.nlist, args.nprobe, args.k, args.top_users, args.seed)
@@ -3,8 +3,6 @@ import os
 from src.config import settings
 from src.models.document import InvalidFileTypeError, CVResponse
 from src.services.extractor import upload_document
-from src.agents.agent import configure_llm
-from src.agents.parser_agent.parser import CVParserAgent
 from src.utils.util import extract_text_from_pdf
 
 from typing import Union
@@ -16,6 +14,10 @@ router = APIRouter(prefix="/cv")
 def parse_document_endpoint(file: Union[UploadFile, str]):
     """Parse a CV document and return structured data. Accepts an UploadFile (production) or a local path (for tests)."""
     
+    # dspy is heavy, load it on first use rather than at startup
+    from src.agents.agent import configure_llm
+    from src.agents.parser_agent.parser import CVParserAgent
+
     try:
         configure_llm()
        
@@ -1,19 +1,17 @@
-import numpy as np
-import dspy 
-import string
 import time
 
-from src.models.roster import RosterRecommendationsResponse
+from src.models.roster import RosterRecommendationsResponse, TaskEmbeddingsResponse
 
 from src.configs.mongodb import get_database
 from src.config import settings
-from src.agents.agent import configure_llm_roster
-from src.agents.recommendation_agent.model import RecommendationModel, ClassifySkillModel
+from src.services.features import build_candidate_features, clean_skills_name, load_candidate_features
+from src.services.incremental import CONTRIBUTED_TASK_FILTER, enqueue_task_embeddings
+from src.utils.singleflight import SingleFlight, request_key
 
 from bson import ObjectId
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, List
 from collections import defaultdict
 
@@ -28,66 +26,62 @@ class SkillRequest(BaseModel):
 
 class EmbeddingProjectRequest(BaseModel):
     project_id: str
+
+class EmbeddingTaskRequest(BaseModel):
+    task_ids: List[str]
     
-def clean_skills_name(str):
-    return str.lower().strip().translate(str.maketrans("", "", string.punctuation))
-    
-router = APIRouter()
+def normalize_skill_request(request: SkillRequest) -> dict:
+    """Canonical form of a roster request, so retries and double-clicks share one computation.
+
+    Position names stay as sent: they are matched exactly against ``positions.name``.
+    """
+    return {
+        "description": " ".join(request.description.split()),
+        "positions": sorted((p.name, p.numOfRequest) for p in request.positions),
+        "skills": sorted({" ".join(skill.split()).casefold() for skill in request.skills or []}),
+    }
 
-@router.post("/project-embeddings")
-async def create_project_embeddings(request: EmbeddingProjectRequest):
-    print(request.project_id)
-    database = get_database()
+def build_project_tasks_pipeline(project_id: ObjectId) -> list:
+    """Task titles of each contributor to a completed project, starting from its indexed tasks."""
+    return [
+      # Start from this project's contributed tasks, the same ones the incremental path counts (tasks.projectId + status index)
+      {"$match": {"projectId": project_id, **CONTRIBUTED_TASK_FILTER}},
 
-    embedder = dspy.Embedder(
-      model=settings.EMBEDDING_MODEL, 
-      api_base=settings.EMBEDDING_MODEL_BASE_URL,
-      api_key=settings.LLM_API_KEY
-    )
-
-    # Ngambil deskripsi task tiap2 user
-    pipeline = [
-      # Start from taskassignments
+      # Lookup project info
       {
           "$lookup": {
-              "from": "tasks",
-              "localField": "taskId",
+              "from": "projects",
+              "localField": "projectId",
               "foreignField": "_id",
-              "as": "task"
+              "as": "project"
           }
       },
-      {"$unwind": "$task"},
+      {"$unwind": "$project"},
 
-      # Filter by this project
-      {"$match": {"task.projectId": ObjectId(request.project_id)}},
+      # Only completed project
+      {"$match": {"project.status": "completed"}},
 
-      # Lookup user info
+      # Lookup assignees (taskassignments.taskId index)
       {
           "$lookup": {
-              "from": "users",
-              "localField": "userId",
-              "foreignField": "_id",
-              "as": "user"
+              "from": "taskassignments",
+              "localField": "_id",
+              "foreignField": "taskId",
+              "as": "assignment"
           }
       },
-      {"$unwind": "$user"},
-
-      # Completed or in progress task
-      {"$match": {"task.status": { "$in": ["done", "in_progress"] }}},
+      {"$unwind": "$assignment"},
 
-      # Lookup project info
+      # Lookup user info
       {
           "$lookup": {
-              "from": "projects",
-              "localField": "task.projectId",
+              "from": "users",
+              "localField": "assignment.userId",
               "foreignField": "_id",
-              "as": "project"
+              "as": "user"
           }
       },
-      {"$unwind": "$project"},
-
-      # Only completed project
-      {"$match": {"project.status": "completed"}},
+      {"$unwind": "$user"},
 
       # Group by user
       {
@@ -95,7 +89,8 @@ async def create_project_embeddings(request: EmbeddingProjectRequest):
               "_id": "$user._id",
               "user_id": {"$first": "$user._id"},
               "user_name": {"$first": "$user.name"},
-              "tasks": {"$addToSet": "$task.title"},
+              "tasks": {"$addToSet": "$title"},
+              "task_ids": {"$addToSet": "$_id"},
               "project_id": {"$first": "$project._id"},
               "project_name": {"$first": "$project.name"}
           }
@@ -111,7 +106,8 @@ async def create_project_embeddings(request: EmbeddingProjectRequest):
                   "$push": {
                       "user_id": "$user_id",
                       "user_name": "$user_name",
-                      "tasks": "$tasks"
+                      "tasks": "$tasks",
+                      "task_ids": "$task_ids"
                   }
               }
           }
@@ -128,7 +124,32 @@ async def create_project_embeddings(request: EmbeddingProjectRequest):
       }
     ]
 
-    results = list(database.taskassignments.aggregate(pipeline))
+router = APIRouter()
+
+project_embedding_requests = SingleFlight("project-embeddings")
+roster_requests = SingleFlight("roster-recommendations")
+
+@router.post("/project-embeddings")
+def create_project_embeddings(request: EmbeddingProjectRequest):
+    key = request_key({"project_id": request.project_id.strip()})
+    return project_embedding_requests.do(key, lambda: _create_project_embeddings(request))
+
+def _create_project_embeddings(request: EmbeddingProjectRequest):
+    import dspy
+
+    print(request.project_id)
+    database = get_database()
+
+    embedder = dspy.Embedder(
+      model=settings.EMBEDDING_MODEL, 
+      api_base=settings.EMBEDDING_MODEL_BASE_URL,
+      api_key=settings.LLM_API_KEY
+    )
+
+    # Ngambil deskripsi task tiap2 user
+    pipeline = build_project_tasks_pipeline(ObjectId(request.project_id))
+
+    results = list(database.tasks.aggregate(pipeline))
     
     for project in results:
       for user in project["users"]:
@@ -139,15 +160,23 @@ async def create_project_embeddings(request: EmbeddingProjectRequest):
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Embedding generation failed: {e}")
 
+        now = datetime.now(timezone.utc)
         doc = {
-            "user_id": user["user_id"],
-            "project_id": project["project_id"],
             "description": combinedTask,
             "embeddings": embeddings.tolist(),
-            "created_at": datetime.now(),
+            "task_ids": user["task_ids"],
+            "task_count": len(user["task_ids"]),
+            "tasks_since_reembed": 0,
+            "mode": "full",
+            "updated_at": now,
         }
 
-        database.projectembeddings.insert_one(doc)
+        # Replaces any running vector built incrementally while the project was active
+        database.projectembeddings.update_one(
+            {"user_id": user["user_id"], "project_id": project["project_id"]},
+            {"$set": doc, "$inc": {"version": 1}, "$setOnInsert": {"created_at": now}},
+            upsert=True
+        )
     
     print(results)
     # return {
@@ -155,9 +184,30 @@ async def create_project_embeddings(request: EmbeddingProjectRequest):
     #     "project_id": request.project_id
     # }
 
+@router.post("/task-embeddings", response_model=TaskEmbeddingsResponse, status_code=202)
+def queue_task_embeddings(request: EmbeddingTaskRequest):
+    invalid = [task_id for task_id in request.task_ids if not ObjectId.is_valid(task_id)]
+    if invalid:
+        raise HTTPException(status_code=422, detail=f"Invalid task ids: {', '.join(invalid)}")
+
+    queued = enqueue_task_embeddings(get_database(), [ObjectId(task_id) for task_id in request.task_ids])
+    return {"status": "queued", "queued": queued}
+
 @router.post("/roster-recommendations", response_model=RosterRecommendationsResponse)
 def get_recommendations(request: SkillRequest):
+    key = request_key(normalize_skill_request(request))
+    return roster_requests.do(key, lambda: _get_recommendations(request), cache_ttl=settings.ROSTER_CACHE_TTL)
+
+def _get_recommendations(request: SkillRequest):
+    # dspy and numpy are heavy, load them on first use rather than at startup
+    import dspy
+    import numpy as np
+    from src.agents.agent import configure_llm_roster
+    from src.agents.recommendation_agent.model import RecommendationModel, ClassifySkillModel
+    from src.services.similarity import get_similarity_index
+
     logs = {
+        "feature_loading_time": 0,
         "workload_calculation_time": 0,
         "classifying_skills": 0,
         "skill_matching_time": 0,
@@ -169,7 +219,6 @@ def get_recommendations(request: SkillRequest):
     
     total_start_time = time.time()
     database = get_database()
-    user_collection = database.get_collection("users")
     
     # INIT: user request parameters
     project_description = request.description
@@ -188,28 +237,41 @@ def get_recommendations(request: SkillRequest):
     print(position_with_skills)
     logs["classifying_skills"] += time.time() - start_time
 
-    # MAIN
+    # Embed the project description once and query every user's history in a single pass
+    start_time = time.time()
+    embedder = dspy.Embedder(
+        model=settings.EMBEDDING_MODEL, 
+        api_base=settings.EMBEDDING_MODEL_BASE_URL,
+        api_key=settings.LLM_API_KEY
+    )
+    embeddings = embedder(project_description)
+    similarity_index = get_similarity_index(database)
+    logs["vector_retrieval_time"] += time.time() - start_time
+
+    start_time = time.time()
+    project_similarities = similarity_index.top_k_per_user(embeddings, k=3)
+    logs["project_similarity_time"] += time.time() - start_time
+
+    # MAIN: features come from the precomputed store, or are built live in one batch
+    start_time = time.time()
+    candidates = load_candidate_features(database) if settings.FEATURE_STORE_ENABLED else []
+    if not candidates:
+        candidates = build_candidate_features(database)
+    logs["feature_loading_time"] += time.time() - start_time
+
     scores = []
-    for user in user_collection.find({"role": "staff"}):
-        user_id = user.get("_id")
-        manager_id = user.get("managerId")
-        manager = database.get_collection("users").find_one({"_id": manager_id}, {"_id": 1,"name": 1})
-        position_id = user.get("position")
-        position = database.get_collection("positions").find_one({"_id": position_id}, {"name": 1})
-        position_name = position["name"] if position and position.get("name") else None
-        print(position_name)
+    for candidate in candidates:
+        user_id = candidate["_id"]
+        position_name = candidate["position"]
+        manager = candidate["manager"]
 
         # 1. matching skills, FURTHER IMPROVEMENT: maybe we can use AI to match some typo skills
         start_time = time.time()
-        skill_ids = user.get("skills", [])
-        skills = list(database.get_collection("skills").find({"_id": {"$in": skill_ids}}, {"name": 1}))
-        user_skills = [clean_skills_name(skill["name"]) for skill in skills]
+        user_skills = candidate["skill_keys"]
         required_skills = [clean_skills_name(skill) for skill in position_with_skills.get(position_name, [])]
         
         matched_count = len(set(required_skills) & set(user_skills))
         total = len(set(required_skills))
-        print("Yang cocok: ", matched_count)
-        print("Butuh brp: ", total)
         matched_count_score = 0.0 if total == 0 else matched_count / total
         print("Required skills: ", required_skills)
         print("User skills: ", user_skills)
@@ -217,27 +279,7 @@ def get_recommendations(request: SkillRequest):
 
         # 2. workload counter
         start_time = time.time()
-        project_pipeline = [
-            {"$match": {"userId": user_id}},
-            {"$lookup": {
-                "from": "projects",
-                "localField": "projectId",
-                "foreignField": "_id",
-                "as": "project"
-            }},
-            {"$unwind": "$project"},
-            {"$match": {"project.status": "active"}},
-            {"$group": {"_id": "$project._id"}},
-            {"$count": "total"}
-        ]
-
-        result = list(database.get_collection("projectassignments").aggregate(project_pipeline))
-        project_count = result[0]["total"] if result else 0
-
-        # project_assignments = list(database.get_collection("projectassignments").aggregate(project_pipeline))
-        print(result)
-        # project_count = len(project_assignments)
-        print("Proyek gweh: ", project_count)
+        project_count = candidate["active_projects"]
 
         if project_count == 0:
             project_count_score = 1.0
@@ -247,58 +289,24 @@ def get_recommendations(request: SkillRequest):
             # menurun 0.2 tiap project
             project_count_score = 1.0 - (project_count * 0.2)
 
-        print("Proyek count score: ", project_count_score)
-
         logs["workload_calculation_time"] += time.time() - start_time
 
-        # 3. Embedding vector
-        start_time = time.time()
-        embedder = dspy.Embedder(
-            model=settings.EMBEDDING_MODEL, 
-            api_base=settings.EMBEDDING_MODEL_BASE_URL,
-            api_key=settings.LLM_API_KEY
-        )
-
-        embeddings = embedder(project_description)
-
-        # NOTE: projectembeddings stores task title, jadi nanti yang masuk database, deskripsinya itu joinan dari task title
-        embeddings_collection = database.get_collection("projectembeddings")
-        project_history_refs = list(embeddings_collection.find({"user_id": user_id}, {"project_id": 1, "embeddings": 1, "description": 1}))
-        logs["vector_retrieval_time"] += time.time() - start_time
-
-        start_time = time.time()
-        # 4. Calculate cosine similarity for each project
-        def cosine_similarity(vec_a, vec_b): 
-            a = np.array(vec_a)
-            b = np.array(vec_b)
-            return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-
-        similarities = []
-        if len(project_history_refs) == 0:
-            similarities.append(0)
-        else:
-            for history in project_history_refs:
-                sim = cosine_similarity(embeddings, history["embeddings"])
-                similarities.append(sim)
-
-        # Ambil 3 similarity terbesar
-        top_3 = sorted(similarities, reverse=True)[:3]
+        # 3. Project similarity, average of the 3 most similar past projects
+        top_3 = project_similarities.get(user_id, [0])
         top_3_avg = np.mean(top_3)
-        logs["project_similarity_time"] += time.time() - start_time
 
-        # 5. Merge all the data
-        print(manager)
+        # 4. Merge all the data
         result = {
             "_id": str(user_id),
-            "name": user.get("name"),
+            "name": candidate["name"],
             "position": position_name,
-            "skills":  [skill["name"] for skill in skills],
+            "skills": candidate["skills"],
             "skillMatch": matched_count_score,
             "currentWorkload": project_count_score,
             "projectSimilarity": 0 if np.isnan(top_3_avg) else float(top_3_avg),
             "manager": {
-                "_id": str(manager.get("_id")),
-                "name": manager.get("name")
+                "_id": str(manager["_id"]),
+                "name": manager["name"]
             },
         }
 
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -10,6 +11,29 @@ class Settings(BaseSettings):
     LLM_MODEL_ROSTER: str
     LLM_BASE_URL_ROSTER: str
     LLM_API_KEY: str
+
+    SIMILARITY_ANN_ENABLED: bool = False
+    SIMILARITY_ANN_MIN_ROWS: int = 5000
+    SIMILARITY_ANN_NLIST: int = 0
+    SIMILARITY_ANN_NPROBE: int = 16
+
+    FEATURE_STORE_ENABLED: bool = False
+    FEATURE_STORE_REFRESH_INTERVAL: int = 300
+
+    ROSTER_CACHE_TTL: int = 60
+
+    EMBEDDING_BATCH_INTERVAL: int = 30
+    EMBEDDING_BATCH_SIZE: int = 100
+    EMBEDDING_REEMBED_THRESHOLD: int = 10
+    EMBEDDING_CLAIM_TIMEOUT: int = 600
+
+    ENSURE_INDEXES_ON_STARTUP: bool = True
+
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 1
+    SERVER_RELOAD: bool = False
+    SHARED_CACHE_DIR: str = "temp/cache"
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -17,4 +41,13 @@ class Settings(BaseSettings):
         extra="ignore"
     )
 
-settings = Settings()
\ No newline at end of file
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+class LazySettings:
+    """Reads the environment on first attribute access instead of at import time."""
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+settings = LazySettings()
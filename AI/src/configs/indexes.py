@@ -0,0 +1,47 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from src.configs.mongodb import connect_to_mongo, close_mongo_connection, get_database
+
+# Indexes backing the AI service's hot queries, by collection
+INDEXES = {
+    "users": [
+        IndexModel([("role", ASCENDING)], name="ai_role"),
+        IndexModel([("updatedAt", ASCENDING)], name="ai_updatedAt"),
+    ],
+    "positions": [IndexModel([("updatedAt", ASCENDING)], name="ai_updatedAt")],
+    "skills": [IndexModel([("updatedAt", ASCENDING)], name="ai_updatedAt")],
+    "projectassignments": [IndexModel([("userId", ASCENDING), ("projectId", ASCENDING)], name="ai_userId_projectId")],
+    "tasks": [IndexModel([("projectId", ASCENDING), ("status", ASCENDING)], name="ai_projectId_status")],
+    "taskassignments": [
+        IndexModel([("taskId", ASCENDING)], name="ai_taskId"),
+        IndexModel([("userId", ASCENDING)], name="ai_userId"),
+    ],
+    "projectembeddings": [
+        IndexModel([("user_id", ASCENDING), ("project_id", ASCENDING)], name="ai_user_id_project_id"),
+        IndexModel([("updated_at", DESCENDING)], name="ai_updated_at"),
+    ],
+    "taskembeddingqueue": [
+        IndexModel([("task_id", ASCENDING)], name="ai_task_id", unique=True),
+        IndexModel([("claimed_at", ASCENDING), ("queued_at", ASCENDING)], name="ai_claimed_at_queued_at"),
+        IndexModel([("claim", ASCENDING)], name="ai_claim"),
+    ],
+}
+
+def ensure_indexes(database) -> dict:
+    """Create any missing index. Existing indexes with the same keys are left untouched."""
+    created = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = database.get_collection(collection_name)
+        existing = {tuple(info["key"]) for info in collection.index_information().values()}
+        missing = [index for index in indexes if tuple(index.document["key"].items()) not in existing]
+        if missing:
+            created[collection_name] = collection.create_indexes(missing)
+    return created
+
+if __name__ == "__main__":
+    connect_to_mongo()
+    try:
+        created = ensure_indexes(get_database())
+        print(f"Created indexes: {created}" if created else "All indexes already exist")
+    finally:
+        close_mongo_connection()
@@ -0,0 +1,29 @@
+import argparse
+import time
+
+from src.configs.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from src.config import settings
+from src.services.features import refresh_candidate_features
+
+def run(full: bool = False, loop: bool = False, interval: int = settings.FEATURE_STORE_REFRESH_INTERVAL):
+    connect_to_mongo()
+    try:
+        while True:
+            start_time = time.time()
+            stats = refresh_candidate_features(get_database(), full=full)
+            print(f"Feature store refreshed in {time.time() - start_time:.2f}s: {stats}")
+            if not loop:
+                break
+            full = False
+            time.sleep(interval)
+    finally:
+        close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute candidate features for roster recommendations")
+    parser.add_argument("--full", action="store_true", help="Rebuild every user instead of only those changed since the last run")
+    parser.add_argument("--loop", action="store_true", help="Keep running and refresh every --interval seconds")
+    parser.add_argument("--interval", type=int, default=settings.FEATURE_STORE_REFRESH_INTERVAL)
+    args = parser.parse_args()
+
+    run(full=args.full, loop=args.loop, interval=args.interval)
@@ -1,7 +1,9 @@
 from src.configs.mongodb import connect_to_mongo, close_mongo_connection
+from src.services.warmup import start_warm_up, get_readiness
 from src.api import cv, roster
-from src.models.main import RootResponse, HealthCheckResponse
-from fastapi import FastAPI, APIRouter
+from src.utils.singleflight import get_singleflight_stats
+from src.models.main import RootResponse, HealthCheckResponse, ReadinessResponse, CoalescingStatsResponse
+from fastapi import FastAPI, APIRouter, Response
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -22,6 +24,9 @@ app.add_middleware(
 async def startup_event():
     connect_to_mongo()
 
+    # Serve /health right away, /ready reports when the heavy modules and caches are loaded
+    start_warm_up()
+
 @app.on_event("shutdown")
 async def shutdown_event():
     close_mongo_connection()
@@ -34,6 +39,23 @@ def root():
 def health_check():
     return {"status": "ok", "message": "Service is healthy"}
 
+@router.get("/ready", response_model=ReadinessResponse)
+def readiness_check(response: Response):
+    readiness = get_readiness()
+    if not readiness["ready"]:
+        response.status_code = 503
+        return {"status": "warming_up", "message": "Service is warming up"}
+    return {
+        "status": "ready",
+        "message": "Service is ready" if not readiness["error"] else "Service is ready, warm-up failed and caches will load on demand",
+        "warmupDuration": readiness["duration"],
+        "error": readiness["error"],
+    }
+
+@router.get("/stats/coalescing", response_model=CoalescingStatsResponse)
+def coalescing_stats():
+    return {"data": get_singleflight_stats()}
+
 app.include_router(router)
 app.include_router(cv.router)
 app.include_router(roster.router)
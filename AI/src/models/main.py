@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Dict, Optional
 
 class RootResponse(BaseModel):
     message: str
@@ -6,3 +7,12 @@ class RootResponse(BaseModel):
 class HealthCheckResponse(BaseModel):
     status: str
     message: str
+
+class ReadinessResponse(BaseModel):
+    status: str
+    message: str
+    warmupDuration: Optional[float] = None
+    error: Optional[str] = None
+
+class CoalescingStatsResponse(BaseModel):
+    data: Dict[str, Dict[str, int]]
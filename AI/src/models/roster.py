@@ -6,6 +6,10 @@ class ProjectEmbeddingsResponse(BaseModel):
     status: str
     project_id: str
 
+class TaskEmbeddingsResponse(BaseModel):
+    status: str
+    queued: int
+
 class ManagerModel(BaseModel):
     id: str = Field(alias="_id")
     name: str
@@ -0,0 +1,35 @@
+import uvicorn
+
+from src.configs.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from src.config import settings
+from src.services.similarity import get_similarity_index
+from src.services.incremental import start_background_processing, stop_background_processing
+
+def build_shared_caches():
+    """Build the memory-mapped snapshots once so workers only have to map them."""
+    try:
+        get_similarity_index(get_database())
+    except Exception as e:
+        print(f"Failed to build shared caches, workers will build them on demand: {e}")
+
+def run():
+    connect_to_mongo()
+    if not settings.SERVER_RELOAD:
+        build_shared_caches()
+
+    # The task embedding batch runs in this launcher process only, never once per worker
+    start_background_processing()
+    try:
+        uvicorn.run(
+            "src.main:app",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            workers=None if settings.SERVER_RELOAD else settings.SERVER_WORKERS,
+            reload=settings.SERVER_RELOAD,
+        )
+    finally:
+        stop_background_processing()
+        close_mongo_connection()
+
+if __name__ == "__main__":
+    run()
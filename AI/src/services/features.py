@@ -0,0 +1,124 @@
+import string
+
+from datetime import datetime, timezone
+from pymongo import ReplaceOne, UpdateOne
+
+FEATURES_COLLECTION = "candidatefeatures"
+META_COLLECTION = "candidatefeatures_meta"
+
+def clean_skills_name(str):
+    return str.lower().strip().translate(str.maketrans("", "", string.punctuation))
+
+def build_active_projects_pipeline(user_ids=None) -> list:
+    pipeline = [
+        {"$lookup": {
+            "from": "projects",
+            "localField": "projectId",
+            "foreignField": "_id",
+            "as": "project"
+        }},
+        {"$unwind": "$project"},
+        {"$match": {"project.status": "active"}},
+        {"$group": {"_id": "$userId", "projects": {"$addToSet": "$projectId"}}},
+        {"$project": {"total": {"$size": "$projects"}}}
+    ]
+    if user_ids is not None:
+        pipeline.insert(0, {"$match": {"userId": {"$in": list(user_ids)}}})
+    return pipeline
+
+def count_active_projects(database, user_ids=None) -> dict:
+    """Return ``{user_id: number of active projects}`` in a single aggregation."""
+    pipeline = build_active_projects_pipeline(user_ids)
+    return {row["_id"]: row["total"] for row in database.projectassignments.aggregate(pipeline)}
+
+def build_candidate_features(database, query=None) -> list:
+    """Compute the roster features of every staff user matching ``query``.
+
+    Positions, skills, managers and workloads are fetched with one query
+    each for the whole batch rather than once per user.
+    """
+    users = list(database.users.find(
+        {"role": "staff", **(query or {})},
+        {"name": 1, "position": 1, "skills": 1, "managerId": 1}
+    ))
+    position_ids = {user.get("position") for user in users}
+    skill_ids = {skill_id for user in users for skill_id in user.get("skills", [])}
+    manager_ids = {user.get("managerId") for user in users}
+
+    positions = {p["_id"]: p.get("name") for p in database.positions.find({"_id": {"$in": list(position_ids)}}, {"name": 1})}
+    skills = {s["_id"]: s["name"] for s in database.skills.find({"_id": {"$in": list(skill_ids)}}, {"name": 1})}
+    managers = {m["_id"]: m.get("name") for m in database.users.find({"_id": {"$in": list(manager_ids)}}, {"name": 1})}
+    workloads = count_active_projects(database, [user["_id"] for user in users])
+
+    refreshed_at = datetime.now(timezone.utc)
+    features = []
+    for user in users:
+        skill_names = [skills[skill_id] for skill_id in user.get("skills", []) if skill_id in skills]
+        manager_id = user.get("managerId")
+        features.append({
+            "_id": user["_id"],
+            "name": user.get("name"),
+            "position": positions.get(user.get("position")) or None,
+            "skills": skill_names,
+            "skill_keys": [clean_skills_name(name) for name in skill_names],
+            "active_projects": workloads.get(user["_id"], 0),
+            "manager": {"_id": manager_id, "name": managers.get(manager_id)},
+            "refreshed_at": refreshed_at,
+        })
+    return features
+
+def _changed_user_query(database, since: datetime) -> dict:
+    """Staff users whose own document, position, skills or manager changed after ``since``."""
+    changed = {"updatedAt": {"$gt": since}}
+    changed_positions = database.positions.distinct("_id", changed)
+    changed_skills = database.skills.distinct("_id", changed)
+    changed_users = database.users.distinct("_id", changed)
+
+    return {"$or": [
+        {"_id": {"$in": changed_users}},
+        {"position": {"$in": changed_positions}},
+        {"skills": {"$in": changed_skills}},
+        {"managerId": {"$in": changed_users}},
+    ]}
+
+def refresh_candidate_features(database, full: bool = False) -> dict:
+    """Bring the feature store up to date and return refresh statistics.
+
+    An incremental refresh only rebuilds users touched since the previous
+    run (based on ``updatedAt``). Workload counts are recomputed for every
+    stored user since project assignments carry no timestamps and deleted
+    assignments cannot be detected otherwise.
+    """
+    store = database.get_collection(FEATURES_COLLECTION)
+    meta = database.get_collection(META_COLLECTION)
+    started_at = datetime.now(timezone.utc)
+
+    state = meta.find_one({"_id": "refresh"})
+    full = full or state is None
+    query = None if full else _changed_user_query(database, state["last_refresh_at"])
+
+    features = build_candidate_features(database, query)
+    if features:
+        store.bulk_write([ReplaceOne({"_id": f["_id"]}, f, upsert=True) for f in features], ordered=False)
+
+    # Drop users that were deleted or are no longer staff
+    staff_ids = database.users.distinct("_id", {"role": "staff"})
+    removed = store.delete_many({"_id": {"$nin": staff_ids}}).deleted_count
+
+    workloads = count_active_projects(database)
+    stored_ids = store.distinct("_id")
+    if stored_ids:
+        store.bulk_write(
+            [UpdateOne({"_id": user_id}, {"$set": {"active_projects": workloads.get(user_id, 0)}}) for user_id in stored_ids],
+            ordered=False
+        )
+
+    meta.replace_one(
+        {"_id": "refresh"},
+        {"_id": "refresh", "last_refresh_at": started_at, "full": full},
+        upsert=True
+    )
+    return {"full": full, "refreshed": len(features), "removed": removed}
+
+def load_candidate_features(database) -> list:
+    return list(database.get_collection(FEATURES_COLLECTION).find({}))
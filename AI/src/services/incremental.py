@@ -0,0 +1,204 @@
+import uuid
+import threading
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pymongo import UpdateOne
+
+from src.config import settings
+from src.configs.mongodb import connect_to_mongo, close_mongo_connection, get_database
+
+QUEUE_COLLECTION = "taskembeddingqueue"
+
+# Tasks that count towards a contributor's project embedding, in both the
+# incremental and the full recompute. Dragging a task to the Done column
+# of the board only changes its columnKey, so that counts as well.
+CONTRIBUTED_TASK_FILTER = {"$or": [{"status": {"$in": ["done", "in_progress"]}}, {"columnKey": "done"}]}
+_MAX_WRITE_ATTEMPTS = 5
+
+def enqueue_task_embeddings(database, task_ids) -> int:
+    """Queue completed tasks for the next embedding batch. Queuing a task twice is a no-op."""
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne({"task_id": task_id}, {"$setOnInsert": {"task_id": task_id, "queued_at": now, "claimed_at": None}}, upsert=True)
+        for task_id in task_ids
+    ]
+    if ops:
+        database.get_collection(QUEUE_COLLECTION).bulk_write(ops, ordered=False)
+    return len(ops)
+
+def _claim_batch(queue, batch_size: int) -> tuple:
+    """Claim up to ``batch_size`` queued tasks, including claims abandoned by a crashed processor.
+
+    Returns the claim token and the claimed documents. The claim is a single
+    ``update_many`` that re-checks availability, so concurrent processors never
+    share a task.
+    """
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.EMBEDDING_CLAIM_TIMEOUT)
+    available = {"$or": [{"claimed_at": None}, {"claimed_at": {"$lt": stale}}]}
+    token = uuid.uuid4().hex
+
+    ids = [doc["_id"] for doc in queue.find(available, {"_id": 1}, sort=[("queued_at", 1)], limit=batch_size)]
+    if not ids:
+        return token, []
+    queue.update_many({"_id": {"$in": ids}, **available}, {"$set": {"claimed_at": now, "claim": token}})
+    return token, list(queue.find({"claim": token}))
+
+def _embedder():
+    import dspy
+
+    return dspy.Embedder(
+        model=settings.EMBEDDING_MODEL,
+        api_base=settings.EMBEDDING_MODEL_BASE_URL,
+        api_key=settings.LLM_API_KEY
+    )
+
+def _merge(doc, delta: dict, title_vectors: dict, embedder) -> dict:
+    import numpy as np
+
+    doc = doc or {}
+    new_vectors = np.array([title_vectors[task_id] for task_id in delta])
+    count = doc.get("task_count", len(doc.get("task_ids", [])))
+    if doc.get("embeddings") and count:
+        embeddings = (np.asarray(doc["embeddings"]) * count + new_vectors.sum(axis=0)) / (count + len(delta))
+    else:
+        embeddings = new_vectors.mean(axis=0)
+
+    update = {
+        "description": ", ".join(filter(None, [doc.get("description"), *delta.values()])),
+        "embeddings": embeddings,
+        "task_ids": list(doc.get("task_ids", [])) + list(delta),
+        "task_count": count + len(delta),
+        "tasks_since_reembed": doc.get("tasks_since_reembed", 0) + len(delta),
+    }
+    if update["tasks_since_reembed"] >= settings.EMBEDDING_REEMBED_THRESHOLD:
+        update["embeddings"] = np.atleast_2d(embedder([update["description"]]))[0]
+        update["tasks_since_reembed"] = 0
+
+    update["embeddings"] = update["embeddings"].tolist()
+    update["mode"] = "incremental"
+    return update
+
+def _write(collection, key, doc, update) -> bool:
+    """Store ``update`` only if the document is still the one it was computed from."""
+    user_id, project_id = key
+    now = datetime.now(timezone.utc)
+    if doc is None:
+        result = collection.update_one(
+            {"user_id": user_id, "project_id": project_id},
+            {"$setOnInsert": {**update, "version": 1, "created_at": now, "updated_at": now}},
+            upsert=True
+        )
+        return result.upserted_id is not None
+
+    # Missing or null version matches documents written before versioning
+    result = collection.update_one(
+        {"_id": doc["_id"], "version": doc.get("version")},
+        {"$set": {**update, "version": (doc.get("version") or 0) + 1, "updated_at": now}}
+    )
+    return result.matched_count == 1
+
+def apply_task_deltas(database, task_ids, embedder) -> int:
+    """Fold newly completed tasks into each contributor's project embedding.
+
+    Every new task title is embedded on its own and averaged into the
+    stored vector, weighted by the number of tasks it already covers. Once
+    ``EMBEDDING_REEMBED_THRESHOLD`` tasks have been averaged in, the full
+    task list is embedded again so the vector does not drift from what a
+    whole-project recompute would produce.
+
+    Each write is conditional on the ``version`` that was read. When another
+    processor or a ``/project-embeddings`` recompute got there first, the
+    document is read again and the remaining tasks are merged into it.
+    Returns the number of updated embeddings.
+    """
+    import numpy as np
+
+    tasks = {
+        task["_id"]: task
+        for task in database.tasks.find(
+            {"_id": {"$in": list(task_ids)}, **CONTRIBUTED_TASK_FILTER},
+            {"title": 1, "projectId": 1}
+        )
+    }
+    deltas = defaultdict(dict)
+    for assignment in database.taskassignments.find({"taskId": {"$in": list(tasks)}}, {"taskId": 1, "userId": 1}):
+        task = tasks[assignment["taskId"]]
+        deltas[(assignment["userId"], task["projectId"])][task["_id"]] = task["title"]
+    if not deltas:
+        return 0
+
+    collection = database.get_collection("projectembeddings")
+    existing = {
+        (doc["user_id"], doc["project_id"]): doc
+        for doc in collection.find({"$or": [{"user_id": user_id, "project_id": project_id} for user_id, project_id in deltas]})
+    }
+
+    def pending(key, doc):
+        embedded = set((doc or {}).get("task_ids", []))
+        return {task_id: title for task_id, title in deltas[key].items() if task_id not in embedded}
+
+    # One embedding call for every new title in the batch
+    new_tasks = {}
+    for key in deltas:
+        new_tasks.update(pending(key, existing.get(key)))
+    if not new_tasks:
+        return 0
+    title_vectors = dict(zip(new_tasks, np.atleast_2d(embedder(list(new_tasks.values())))))
+
+    updated = 0
+    for key in deltas:
+        doc = existing.get(key)
+        for _ in range(_MAX_WRITE_ATTEMPTS):
+            delta = pending(key, doc)
+            if not delta:
+                break
+            if _write(collection, key, doc, _merge(doc, delta, title_vectors, embedder)):
+                updated += 1
+                break
+            doc = collection.find_one({"user_id": key[0], "project_id": key[1]})
+        else:
+            # Leave the batch claimed, it is retried once the claim times out
+            raise RuntimeError(f"Concurrent updates to the embedding of user {key[0]} in project {key[1]}")
+    return updated
+
+def process_queue(database, batch_size: int = None) -> int:
+    """Process one batch of the queue and return how many tasks were claimed."""
+    queue = database.get_collection(QUEUE_COLLECTION)
+    token, batch = _claim_batch(queue, batch_size or settings.EMBEDDING_BATCH_SIZE)
+    if not batch:
+        return 0
+
+    updated = apply_task_deltas(database, [doc["task_id"] for doc in batch], _embedder())
+    # Only remove on success, a failed batch is retried once its claim times out
+    queue.delete_many({"claim": token})
+    print(f"Embedded {len(batch)} completed tasks, {updated} project embeddings updated")
+    return len(batch)
+
+_stop = threading.Event()
+
+def _run():
+    while not _stop.wait(settings.EMBEDDING_BATCH_INTERVAL):
+        try:
+            while process_queue(get_database()) == settings.EMBEDDING_BATCH_SIZE:
+                pass
+        except Exception as e:
+            print(f"Task embedding batch failed: {e}")
+
+def start_background_processing():
+    """Run the batch processor in a thread. Start it in one process only, not in every web worker."""
+    _stop.clear()
+    threading.Thread(target=_run, name="task-embeddings", daemon=True).start()
+
+def stop_background_processing():
+    _stop.set()
+
+if __name__ == "__main__":
+    connect_to_mongo()
+    try:
+        _run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_mongo_connection()
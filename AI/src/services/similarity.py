@@ -0,0 +1,261 @@
+import os
+import json
+import uuid
+import shutil
+import threading
+import numpy as np
+
+from bson import ObjectId
+from src.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows, snapshots are then built without a cross-process lock
+    fcntl = None
+
+_ARRAYS = ("vectors", "user_codes", "user_rows", "user_offsets", "centroids", "list_offsets", "list_rows")
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class ProjectSimilarityIndex:
+    """Cosine-similarity index over the rows of ``projectembeddings``.
+
+    Small datasets are scanned exactly. Once the number of rows reaches
+    ``min_rows_for_ann`` (and ANN is enabled) an IVF structure is built:
+    rows are clustered with spherical k-means and a query only scans the
+    ``nprobe`` clusters closest to it. Users with fewer than ``k`` rows in
+    those clusters are then scored exactly from their own rows, so every
+    user gets a complete top-k.
+    """
+
+    def __init__(self, user_ids, vectors, use_ann=False, min_rows_for_ann=5000, nlist=0, nprobe=16, seed=0):
+        self.users = []
+        codes = {}
+        for user_id in user_ids:
+            if user_id not in codes:
+                codes[user_id] = len(self.users)
+                self.users.append(user_id)
+        self.user_codes = np.array([codes[user_id] for user_id in user_ids], dtype=np.int32)
+        self.vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+
+        # Rows grouped by user, so a single user's rows can be scored without a full scan
+        self.user_rows = np.argsort(self.user_codes, kind="stable").astype(np.int64)
+        self.user_offsets = np.searchsorted(self.user_codes[self.user_rows], np.arange(len(self.users) + 1))
+
+        self.nprobe = nprobe
+        self.centroids = None
+        self.list_offsets = None
+        self.list_rows = None
+        if use_ann and len(self.vectors) >= min_rows_for_ann:
+            self._build_ivf(nlist or int(np.sqrt(len(self.vectors))), seed)
+
+    @classmethod
+    def from_collection(cls, collection, **kwargs):
+        user_ids, vectors = [], []
+        dim = None
+        # Newest rows first, so the current embedding model sets the expected length
+        for doc in collection.find({}, {"user_id": 1, "embeddings": 1}, sort=[("_id", -1)]):
+            embeddings = doc.get("embeddings")
+            if not embeddings:
+                continue
+            # Skip rows produced by a different embedding model
+            dim = dim or len(embeddings)
+            if len(embeddings) != dim:
+                continue
+            user_ids.append(doc["user_id"])
+            vectors.append(embeddings)
+
+        vectors = np.array(vectors, dtype=np.float32).reshape(len(vectors), dim or 0)
+        return cls(user_ids, vectors, **kwargs)
+
+    @property
+    def is_approximate(self) -> bool:
+        return self.centroids is not None
+
+    def _build_ivf(self, nlist: int, seed: int, n_iter: int = 10):
+        rng = np.random.default_rng(seed)
+        n = len(self.vectors)
+        nlist = max(1, min(nlist, n))
+
+        # Train on a sample, then assign every row to its closest centroid
+        sample = self.vectors[rng.choice(n, size=min(n, nlist * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(n_iter):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+
+        assign = np.argmax(self.vectors @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.list_rows = np.argsort(assign, kind="stable").astype(np.int64)
+        self.list_offsets = np.searchsorted(assign[self.list_rows], np.arange(nlist + 1))
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        if not self.is_approximate:
+            return np.arange(len(self.vectors))
+
+        nprobe = min(self.nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe])
+
+    def _rows_of_users(self, codes) -> np.ndarray:
+        if len(codes) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([self.user_rows[self.user_offsets[c]:self.user_offsets[c + 1]] for c in codes])
+
+    def _top_k_by_user(self, rows, query, k: int) -> dict:
+        """Return ``{user_code: [similarity, ...]}`` over ``rows``, keeping each user's ``k`` best."""
+        sims = self.vectors[rows] @ query
+
+        # Sort by user, then by similarity descending, and keep the first k of each user
+        codes = self.user_codes[rows]
+        order = np.lexsort((-sims, codes))
+        codes, sims = codes[order], sims[order]
+        starts = np.flatnonzero(np.r_[True, np.diff(codes) != 0])
+        group_start = np.repeat(starts, np.diff(np.r_[starts, len(codes)]))
+        keep = (np.arange(len(codes)) - group_start) < k
+
+        result = {}
+        for code, sim in zip(codes[keep].tolist(), sims[keep].tolist()):
+            result.setdefault(code, []).append(sim)
+        return result
+
+    def top_k_per_user(self, query, k: int = 3) -> dict:
+        """Return ``{user_id: [similarity, ...]}`` with each user's ``k`` best matches, highest first."""
+        if len(self.vectors) == 0:
+            return {}
+
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(-1))
+        if query.shape[0] != self.vectors.shape[1]:
+            # Every stored row comes from another embedding model, there is no history to compare with
+            return {}
+
+        result = self._top_k_by_user(self._candidates(query), query, k)
+
+        if self.is_approximate:
+            # IVF only picks candidates, users it under-covers are scored from all their rows
+            hits = np.zeros(len(self.users), dtype=np.int64)
+            hits[list(result)] = [len(sims) for sims in result.values()]
+            missing = np.flatnonzero(hits < np.minimum(k, np.diff(self.user_offsets)))
+            result.update(self._top_k_by_user(self._rows_of_users(missing), query, k))
+
+        return {self.users[code]: sims for code, sims in result.items()}
+
+    def save(self, directory: str, signature) -> str:
+        """Write the index as ``.npy`` files and make it the current snapshot of ``directory``."""
+        os.makedirs(directory, exist_ok=True)
+        name = f"index-{uuid.uuid4().hex}"
+        path = os.path.join(directory, name)
+        os.makedirs(path)
+
+        for attr in _ARRAYS:
+            value = getattr(self, attr)
+            if value is not None:
+                np.save(os.path.join(path, f"{attr}.npy"), value)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({
+                "signature": signature,
+                "users": [str(user_id) for user_id in self.users],
+                "nprobe": self.nprobe,
+            }, f)
+
+        # Swap the pointer atomically; workers still mapping the old snapshot keep their pages
+        pointer = os.path.join(directory, "current")
+        with open(f"{pointer}.tmp", "w") as f:
+            f.write(name)
+        os.replace(f"{pointer}.tmp", pointer)
+
+        for entry in os.listdir(directory):
+            if entry.startswith("index-") and entry != name:
+                shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+        return path
+
+    @classmethod
+    def load(cls, directory: str, signature=None):
+        """Memory-map the current snapshot of ``directory``, or return None if it is missing or stale."""
+        try:
+            with open(os.path.join(directory, "current")) as f:
+                path = os.path.join(directory, f.read().strip())
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if signature is not None and meta["signature"] != signature:
+            return None
+
+        index = cls.__new__(cls)
+        index.users = [ObjectId(user_id) if ObjectId.is_valid(user_id) else user_id for user_id in meta["users"]]
+        index.nprobe = meta["nprobe"]
+        try:
+            for attr in _ARRAYS:
+                file = os.path.join(path, f"{attr}.npy")
+                setattr(index, attr, np.load(file, mmap_mode="r") if os.path.exists(file) else None)
+        except (OSError, ValueError):
+            # Snapshot replaced by another process while loading
+            return None
+        if index.user_rows is None:
+            # Written before rows were grouped by user
+            return None
+        return index
+
+_lock = threading.Lock()
+_cache = {"index": None, "signature": None}
+
+def _collection_signature(collection):
+    # Incremental embeddings update rows in place, so track the latest update as well as inserts
+    latest = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    updated = collection.find_one({}, {"updated_at": 1}, sort=[("updated_at", -1)])
+    return [
+        collection.estimated_document_count(),
+        str(latest["_id"]) if latest else None,
+        str(updated.get("updated_at")) if updated else None,
+    ]
+
+def _build_index(collection) -> ProjectSimilarityIndex:
+    return ProjectSimilarityIndex.from_collection(
+        collection,
+        use_ann=settings.SIMILARITY_ANN_ENABLED,
+        min_rows_for_ann=settings.SIMILARITY_ANN_MIN_ROWS,
+        nlist=settings.SIMILARITY_ANN_NLIST,
+        nprobe=settings.SIMILARITY_ANN_NPROBE,
+    )
+
+def _load_or_build_shared(collection, signature) -> ProjectSimilarityIndex:
+    """Share one copy of the index between worker processes through a memory-mapped snapshot."""
+    directory = os.path.join(settings.SHARED_CACHE_DIR, "similarity")
+    index = ProjectSimilarityIndex.load(directory, signature)
+    if index is not None:
+        return index
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "w") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            # Another worker may have built it while we waited for the lock
+            index = ProjectSimilarityIndex.load(directory, signature)
+            if index is None:
+                _build_index(collection).save(directory, signature)
+                index = ProjectSimilarityIndex.load(directory, signature)
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    return index
+
+def get_similarity_index(database) -> ProjectSimilarityIndex:
+    """Return the cached index, rebuilding it when ``projectembeddings`` has changed."""
+    collection = database.get_collection("projectembeddings")
+    signature = _collection_signature(collection)
+
+    with _lock:
+        if _cache["index"] is None or _cache["signature"] != signature:
+            index = _load_or_build_shared(collection, signature) if settings.SHARED_CACHE_DIR else None
+            _cache["index"] = index if index is not None else _build_index(collection)
+            _cache["signature"] = signature
+        return _cache["index"]
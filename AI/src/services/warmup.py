@@ -0,0 +1,42 @@
+import time
+import threading
+
+from src.config import settings
+from src.configs.indexes import ensure_indexes
+from src.configs.mongodb import get_database
+
+_state = {"ready": False, "error": None, "duration": None}
+
+def warm_up():
+    """Create missing indexes, import the heavy modules and load the similarity index before the first request needs them."""
+    start_time = time.time()
+    try:
+        if settings.ENSURE_INDEXES_ON_STARTUP:
+            try:
+                created = ensure_indexes(get_database())
+                if created:
+                    print(f"Created indexes: {created}")
+            except Exception as e:
+                # Missing privileges should not keep the service from warming up
+                print(f"Index bootstrap failed: {e}")
+
+        import src.agents.agent
+        import src.agents.parser_agent.parser
+        import src.agents.recommendation_agent.model
+        import src.utils.util
+        from src.services.similarity import get_similarity_index
+
+        get_similarity_index(get_database())
+    except Exception as e:
+        _state["error"] = str(e)
+        print(f"Warm-up failed: {e}")
+    finally:
+        _state["duration"] = round(time.time() - start_time, 2)
+        _state["ready"] = True
+        print(f"Warm-up finished in {_state['duration']}s")
+
+def start_warm_up():
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+def get_readiness() -> dict:
+    return dict(_state)
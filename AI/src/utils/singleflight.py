@@ -0,0 +1,80 @@
+import json
+import time
+import hashlib
+import threading
+
+from collections import OrderedDict
+from concurrent.futures import Future
+
+_registry = {}
+
+def request_key(body) -> str:
+    """Hash a (normalized) request body into a coalescing key."""
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+
+class SingleFlight:
+    """Runs concurrent calls that share a key once and hands every caller the same result.
+
+    Results can also be kept for ``cache_ttl`` seconds so identical requests
+    arriving shortly after reuse them. Errors are shared with the callers
+    that were waiting, but never cached.
+    """
+
+    def __init__(self, name: str, cache_size: int = 128):
+        self.name = name
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._cache = OrderedDict()
+        self.stats = {"calls": 0, "executed": 0, "coalesced": 0, "cache_hits": 0}
+        _registry[name] = self
+
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._cache[key]
+            return None
+        return entry
+
+    def do(self, key: str, fn, cache_ttl: float = 0):
+        with self._lock:
+            self.stats["calls"] += 1
+            entry = self._cached(key)
+            if entry is not None:
+                self.stats["cache_hits"] += 1
+                return entry[1]
+
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.stats["executed"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            if cache_ttl > 0:
+                self._cache[key] = (time.monotonic() + cache_ttl, result)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            del self._in_flight[key]
+        future.set_result(result)
+        return result
+
+def get_singleflight_stats() -> dict:
+    return {name: dict(flight.stats) for name, flight in _registry.items()}
@@ -1,6 +1,5 @@
 from functools import wraps
 import time
-import pypdfium2
 
 def retry_on_error(max_retries=3, delay=1):
     def decorator(func):
@@ -25,6 +24,8 @@ def retry_on_error(max_retries=3, delay=1):
     return decorator
 
 def extract_text_from_pdf(pdf_path: str) -> str:
+    import pypdfium2
+
     try:
         pdf = pypdfium2.PdfDocument(pdf_path)
         
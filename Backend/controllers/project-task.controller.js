@@ -1,5 +1,6 @@
 const { User, Project, ProjectAssignment, Task, TaskAssignment } = require('../models');
 const mongoose = require('mongoose');
+const { queueTaskEmbeddings } = require('../services/ai.service');
 
 const getStaffProjects = async (req, res) => {
   try {
@@ -313,6 +314,10 @@ const updateTaskStatus = async (req, res) => {
     .populate('requiredSkills', 'name')
     .populate('createdBy', 'name email');
 
+    if (status === 'done') {
+      queueTaskEmbeddings(taskId);
+    }
+
     // Get task assignees
     const assignees = await TaskAssignment.find({ taskId })
       .populate('userId', 'name email');
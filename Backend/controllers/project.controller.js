@@ -6,6 +6,7 @@ const {
   TaskAssignment,
 } = require("../models");
 const mongoose = require("mongoose");
+const { queueTaskEmbeddings } = require("../services/ai.service");
 const dotenv = require("dotenv");
 dotenv.config();
 
@@ -654,6 +655,10 @@ const updateTaskStatus = async (req, res) => {
       .populate("requiredSkills", "name")
       .populate("createdBy", "name email");
 
+    if (status === "done") {
+      queueTaskEmbeddings(taskId);
+    }
+
     // Get task assignees
     const assignees = await TaskAssignment.find({ taskId }).populate(
       "userId",
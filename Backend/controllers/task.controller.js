@@ -7,6 +7,7 @@ const { Column } = require("../models");
 // const User = require("../models/User");
 // const { sendEmail } = require("../utils/email");
 const { ProjectAssignment } = require("../models/");
+const { queueTaskEmbeddings } = require("../services/ai.service");
 
 const createColumn = async (req, res) => {
   const { projectId, name, color } = req.body;
@@ -599,6 +600,10 @@ const editTask = async (req, res) => {
       assignedUsers: assignments.map((a) => a.userId),
     };
 
+    if (status === "done" && existingTask.status !== "done") {
+      queueTaskEmbeddings(taskId);
+    }
+
     const io = req.app.get("io");
     if (io) {
       io.to(`project:${existingTask.projectId}`).emit("task:updated", {
@@ -716,6 +721,10 @@ const moveTask = async (req, res) => {
       await task.save({ session });
       await session.commitTransaction();
 
+      if (toColumnKey === "done" && fromColumnKey !== "done") {
+        queueTaskEmbeddings(taskId);
+      }
+
       const io = req.app.get("io");
       if (io) {
         io.to(`project:${projectId}`).emit("task:moved", {
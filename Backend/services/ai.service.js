@@ -0,0 +1,26 @@
+/**
+ * Let the AI service fold finished tasks into their contributors' embeddings
+ * @param {String|Array<String>} taskIds - Task ID or IDs that just moved to done
+ * @returns {Promise<void>}
+ */
+async function queueTaskEmbeddings(taskIds) {
+  try {
+    const response = await fetch(`${process.env.BASE_AI_URL}/task-embeddings`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        task_ids: [].concat(taskIds).map(String),
+      }),
+    });
+    const result = await response.json();
+    console.log(result);
+  } catch (error) {
+    console.error('⚠️ Failed to queue task embeddings:', error);
+  }
+}
+
+module.exports = {
+  queueTaskEmbeddings,
+};